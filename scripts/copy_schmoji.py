@@ -2,11 +2,16 @@
 # Copyright (c) 2025 Mick Schroeder, LLC.
 # #!/usr/bin/env python3
 import argparse
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+import os
 from pathlib import Path
-import shutil
+import re
 import sys
 from typing import Iterable
 
+from utils import copy_asset, ensure_dir, write_lines
+
 # Default set built from Mick's Swift arrays (upper-case hex).
 _SWIFT_CODES = [
     # blue
@@ -26,6 +31,8 @@ _SWIFT_CODES = [
     # yellow
     "1F34C", "1F355", "1F44C", "1F4A1", "1F4AA", "1F603", "1F60E", "1F618", "1F602", "1F92F",
 ]
+# Normalized (lower-case, de-duplicated, order kept) once at import; equals normalize_codes(_SWIFT_CODES)
+_SWIFT_CODES_NORM = tuple(dict.fromkeys(c.strip().lower() for c in _SWIFT_CODES if c.strip()))
 
 DEFAULT_STYLES = ["Color", "3D"]  # sensible default for game assets; override with --styles
 
@@ -52,52 +59,142 @@ def normalize_codes(codes: Iterable[str]) -> list[str]:
     return out
 
 
-def copy_matches(unicode_root: Path, out_root: Path, styles: list[str], codes: list[str], dry_run: bool) -> None:
+def compile_code_pattern(codes: Iterable[str]) -> re.Pattern:
+    """Build one regex that matches any `<code>*.*` filename and captures which code it is.
+
+    Same set of names as globbing `<code>*.*` per code (e.g. `26f8.svg`, `26f8 fe0f.png`, `26f8_2.svg`);
+    if several codes prefix a name, the longest wins. Expects lower-case codes and lower-cased filenames.
+    """
+    alternatives = "|".join(re.escape(c) for c in sorted(codes, key=len, reverse=True))
+    return re.compile(rf"^(?P<code>{alternatives})[^.]*\.")
+
+
+def _scan_by_code(
+    directory: Path, pattern: re.Pattern, prefixes: tuple[str, ...]
+) -> dict[str, list[tuple[str, os.DirEntry]]]:
+    """Read `directory` once and bucket the entries matching `pattern` by code.
+
+    Each entry is stored with its lower-cased name, so names are lowered exactly once per scan.
+    `prefixes` (the codes) is used as a cheap `str.startswith` filter so most names never reach the regex.
+    """
+    by_code: dict[str, list[tuple[str, os.DirEntry]]] = {}
+    with os.scandir(directory) as it:
+        for entry in it:
+            lower_name = entry.name.lower()
+            if "." not in lower_name or not lower_name.startswith(prefixes):
+                continue
+            m = pattern.match(lower_name)
+            if m:
+                by_code.setdefault(m.group("code"), []).append((lower_name, entry))
+    return by_code
+
+
+def preference_table(codes: Iterable[str]) -> dict[str, dict[str, int]]:
+    """Map each code to its preferred filename stems and their priority: exact `<code>`, then `<code> fe0f`."""
+    return {code: {code: 0, f"{code} fe0f": 1} for code in codes}
+
+
+def rank(name: str, prefs: dict[str, int]) -> tuple[int, str]:
+    """Sort key for a code's source candidates: by the stem priority from `prefs` (others last), then by name.
+
+    `name` must already be lower-cased and contain a dot (guaranteed by `_scan_by_code`).
+    """
+    return (prefs.get(name.rpartition(".")[0], 2), name)
+
+
+def _do_copy(task: tuple[str, str, list[str]], preserve_metadata: bool = False, link: bool = False) -> list[str]:
+    """Remove stale destination files for one code, then copy its source. Returns messages to print."""
+    src, dst, stale = task
+    msgs = []
+    # Remove files for this code left by prior runs under another name (e.g. a different extension)
+    for old in stale:
+        try:
+            os.unlink(old)
+        except Exception as e:
+            msgs.append(f"⚠️  Could not remove {old}: {e}")
+    copy_asset(src, dst, preserve_metadata, link)  # atomically replaces `dst`
+    msgs.append(f"{'link' if link else 'copy'} {src} -> {dst}")
+    return msgs
+
+
+def copy_matches(
+    unicode_root: Path,
+    out_root: Path,
+    styles: list[str],
+    codes: list[str],
+    dry_run: bool,
+    preserve_metadata: bool = False,
+    link: bool = False,
+    quiet: bool = False,
+) -> None:
     any_missing = False
+    copied = 0
+    # Duplicate styles would queue concurrent copies to the same destination
+    styles = list(dict.fromkeys(styles))
+    tasks: list[tuple[str, str, list[str]]] = []
+    pattern = compile_code_pattern(codes)
+    prefs_by_code = preference_table(codes)
+    prefixes = tuple(codes)
     for style in styles:
+        # One directory read per style (source and destination) instead of several globs per code;
+        # the scans double as the existence checks.
         src_style_dir = unicode_root / style
-        if not src_style_dir.exists():
+        msgs = []  # written once per style
+        try:
+            src_by_code = _scan_by_code(src_style_dir, pattern, prefixes)
+        except (FileNotFoundError, NotADirectoryError):
             print(f"⚠️  Missing style folder in unicode: {src_style_dir}")
             any_missing = True
             continue
         dst_style_dir = out_root / style
         if not dry_run:
-            dst_style_dir.mkdir(parents=True, exist_ok=True)
+            ensure_dir(dst_style_dir)
+        try:
+            dst_by_code = _scan_by_code(dst_style_dir, pattern, prefixes)
+        except (FileNotFoundError, NotADirectoryError):  # e.g. dry run into a fresh output folder
+            dst_by_code = {}
+        dst_style_str = str(dst_style_dir)
+
         for code in codes:
             # Match base code (e.g., 26f8.svg) and variants with extra suffixes (e.g., 26f8 fe0f.png)
-            candidates = sorted(src_style_dir.glob(f"{code}*.*"))
+            candidates = src_by_code.get(code)
             if not candidates:
-                print(f"⚠️  Not found: {src_style_dir}/{code}.*")
+                msgs.append(f"⚠️  Not found: {src_style_dir}/{code}.*")
                 any_missing = True
                 continue
 
             # Pick one preferred source: exact match > FE0F variant > first candidate
-            preferred = None
-            for pat in (f"{code}.*", f"{code} fe0f.*"):
-                found = sorted(src_style_dir.glob(pat))
-                if found:
-                    preferred = found[0]
-                    break
-            if preferred is None:
-                preferred = candidates[0]
+            prefs = prefs_by_code[code]
+            _, preferred = min(candidates, key=lambda c: rank(c[0], prefs))
 
             # Normalize destination filename to `<code><ext>` so re-runs overwrite (no `_2` growth)
-            dst = dst_style_dir / f"{code}{preferred.suffix}"
+            _, dot, ext = preferred.name.rpartition(".")
+            dst = os.path.join(dst_style_str, code + dot + ext)
+            stale = sorted(old.path for _, old in dst_by_code.get(code, []) if old.path != dst)
 
+            copied += 1
             if dry_run:
                 # Show removals and copy
-                for old in sorted(dst_style_dir.glob(f"{code}*.*")):
-                    print(f"DRY-RUN: remove {old}")
-                print(f"DRY-RUN: copy {preferred} -> {dst}")
+                if not quiet:
+                    msgs.extend(f"DRY-RUN: remove {old}" for old in stale)
+                    msgs.append(f"DRY-RUN: copy {preferred.path} -> {dst}")
             else:
-                # Remove existing files for this code to avoid duplicates from prior runs
-                for old in sorted(dst_style_dir.glob(f"{code}*.*")):
-                    try:
-                        old.unlink()
-                    except Exception as e:
-                        print(f"⚠️  Could not remove {old}: {e}")
-                shutil.copy2(preferred, dst)
-                print(f"copy {preferred} -> {dst}")
+                tasks.append((preferred.path, dst, stale))
+        write_lines(msgs)
+
+    # Copies are independent and I/O-bound; run them concurrently and print results in scan order
+    if tasks:
+        msgs = []
+        with ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 1) * 4)) as ex:
+            for task_msgs in ex.map(partial(_do_copy, preserve_metadata=preserve_metadata, link=link), tasks):
+                # Warnings are always shown; the trailing copy line only when not quiet
+                msgs += task_msgs[:-1] if quiet else task_msgs
+        write_lines(msgs)
+
+    if dry_run:
+        print(f"\n(DRY-RUN) Would copy {copied} files into: {out_root}")
+    else:
+        print(f"\nCopied {copied} files into: {out_root}")
     if any_missing:
         print("\n⚠️  Some assets were missing. Consider regenerating the unicode folder first.")
 
@@ -136,6 +233,21 @@ def main():
     )
     p.add_argument("root", nargs="?", default=".", help="Repo root or assets folder (default: .)")
     p.add_argument("--dry-run", "-n", action="store_true", help="Show what would happen.")
+    p.add_argument(
+        "--preserve-metadata",
+        action="store_true",
+        help="Also copy file mode and timestamps (slower; default copies contents only).",
+    )
+    p.add_argument(
+        "--link",
+        action="store_true",
+        help="Hardlink (or reflink) files instead of copying when on the same filesystem; falls back to copying.",
+    )
+    p.add_argument(
+        "--quiet", "-q",
+        action="store_true",
+        help="Only print warnings and the final summary, not every copied file.",
+    )
 
     args = p.parse_args()
 
@@ -164,7 +276,7 @@ def main():
     if args.codes:
         codes = normalize_codes([c for c in args.codes.split(",")])
     else:
-        codes = normalize_codes(_SWIFT_CODES)
+        codes = list(_SWIFT_CODES_NORM)
 
     if not unicode_root.exists():
         print(f"❌ Unicode root not found: {unicode_root}\nRun rename_files.py first to populate it.")
@@ -175,7 +287,7 @@ def main():
     print(f"Styles: {styles}")
     print(f"Codes: {len(codes)} entries")
 
-    copy_matches(unicode_root, out_root, styles, codes, args.dry_run)
+    copy_matches(unicode_root, out_root, styles, codes, args.dry_run, args.preserve_metadata, args.link, args.quiet)
 
 
 if __name__ == "__main__":
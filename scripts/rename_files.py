@@ -2,78 +2,120 @@
 # Copyright (c) 2025 Mick Schroeder, LLC.
 # #!/usr/bin/env python3
 import argparse
-import json
-import shutil
+from functools import lru_cache, partial
+import multiprocessing
+import os
 from pathlib import Path
 
+try:  # optional: faster parsing of the per-emoji metadata.json files
+    import orjson as _json
+except ImportError:
+    import json as _json
+
+from utils import copy_asset, ensure_dir, write_lines
+
 STYLE_DIRS = ["Color", "Flat", "High Contrast", "3D"]
 IGNORE_FILES = {".DS_Store"}
 
 
-def copy_in_style_dir(style_dir: Path, unicode_code: str, out_root: Path, dry_run: bool) -> None:
+def copy_in_style_dir(
+    style_dir: str | Path,
+    unicode_code: str,
+    out_root: Path,
+    dry_run: bool,
+    preserve_metadata: bool = False,
+    link: bool = False,
+    quiet: bool = False,
+) -> list[str]:
     """Copy all files from a style directory into a flat output directory named by style.
 
     Example: assets/Potato/Color/potato_color.svg -> unicode/Color/1f954.svg
     Multiple files for the same style/emoji will get numeric suffixes to avoid collisions.
+    Returns the progress messages to print (none per file when `quiet`).
     """
-    if not style_dir.is_dir():
-        return
-
-    files = [p for p in sorted(style_dir.iterdir())
-             if p.is_file() and p.name not in IGNORE_FILES and not p.name.startswith(".")]
+    try:
+        with os.scandir(style_dir) as it:
+            # DirEntry.is_file() uses the type cached by readdir, so no extra stat per file
+            files = [e for e in it
+                     if e.name not in IGNORE_FILES and not e.name.startswith(".") and e.is_file()]
+    except (FileNotFoundError, NotADirectoryError):
+        return []
+    files.sort(key=lambda e: e.name)
 
     if not files:
-        return
+        return []
 
-    out_dir = out_root / style_dir.name  # e.g., unicode/Color
+    out_dir = os.path.join(out_root, os.path.basename(style_dir))  # e.g., unicode/Color
     if not dry_run:
-        out_dir.mkdir(parents=True, exist_ok=True)
+        ensure_dir(out_dir)
 
-    for src in files:
-        ext = src.suffix  # keep original suffix (.svg, .png, etc.)
-        target = out_dir / f"{unicode_code}{ext}"
+    msgs = []
+    for entry in files:
+        # keep original suffix (.svg, .png, etc.); dot-files are already skipped
+        _, dot, ext = entry.name.rpartition(".")
+        target = os.path.join(out_dir, unicode_code + (dot + ext if dot else ""))
         if dry_run:
-            print(f"DRY-RUN: copy (overwrite if exists): {src} -> {target}")
+            msgs.append(f"DRY-RUN: copy (overwrite if exists): {entry.path} -> {target}")
         else:
-            shutil.copy2(src, target)  # overwrites if target exists
-            print(f"copy: {src} -> {target}")
-
-
-def process_emoji_dir(emoji_dir: Path, out_root: Path, dry_run: bool) -> None:
+            copy_asset(entry.path, target, preserve_metadata, link)  # overwrites if target exists
+            msgs.append(f"{'link' if link else 'copy'}: {entry.path} -> {target}")
+    return [] if quiet else msgs
+
+
+def process_emoji_dir(
+    emoji_dir: Path,
+    out_root: Path,
+    dry_run: bool,
+    preserve_metadata: bool = False,
+    link: bool = False,
+    quiet: bool = False,
+) -> list[str]:
+    """Copy one emoji folder's assets into `out_root` and return the messages to print.
+
+    Messages are returned rather than printed so callers (including pool workers) can write them in batches.
+    """
     # Skintone handling: If a `Default` variant folder exists, only assets from `Default` are copied; Light/Medium/Dark variants are ignored.
     meta_path = emoji_dir / "metadata.json"
     if not meta_path.exists():
-        return
+        return []
 
     try:
-        with meta_path.open("r", encoding="utf-8") as f:
-            meta = json.load(f)
+        meta = _json.loads(meta_path.read_bytes())
         unicode_code = str(meta.get("unicode", "")).strip().lower()
         if not unicode_code:
-            print(f"⚠️  Missing 'unicode' in {meta_path}")
-            return
+            return [f"⚠️  Missing 'unicode' in {meta_path}"]
     except Exception as e:
-        print(f"⚠️  Failed to read {meta_path}: {e}")
-        return
+        return [f"⚠️  Failed to read {meta_path}: {e}"]
 
     # Prefer skintone "Default" variant when present; otherwise fall back to root styles
-    default_variant = emoji_dir / "Default"
+    default_variant = os.path.join(emoji_dir, "Default")
+    styles_root = default_variant if os.path.isdir(default_variant) else str(emoji_dir)
+    msgs = []
     for style in STYLE_DIRS:
-        src_dir = default_variant / style if default_variant.is_dir() else emoji_dir / style
-        copy_in_style_dir(src_dir, unicode_code, out_root, dry_run)
+        src_dir = os.path.join(styles_root, style)
+        msgs += copy_in_style_dir(src_dir, unicode_code, out_root, dry_run, preserve_metadata, link, quiet)
+    return msgs
+
+
+@lru_cache(maxsize=None)
+def _find_repo_root_cached(start_str: str) -> str:
+    p = start_str
+    while True:
+        if os.path.isdir(os.path.join(p, "assets")):
+            return p
+        parent = os.path.dirname(p)
+        if parent == p:  # reached filesystem root
+            return start_str
+        p = parent
 
 
 def find_repo_root(start: Path) -> Path:
     """Walk up from `start` until we find a directory that contains an `assets` folder;
     if none found, return `start`'s absolute path.
+
+    Results are memoized per resolved start path, since the layout does not change during a run.
     """
-    p = start.resolve()
-    while True:
-        if (p / "assets").is_dir():
-            return p
-        if p.parent == p:  # reached filesystem root
-            return start.resolve()
-        p = p.parent
+    return Path(_find_repo_root_cached(str(start.resolve())))
 
 
 def resolve_out_root(root: Path, out: str | None) -> Path:
@@ -120,6 +162,27 @@ def main():
         action="store_true",
         help="Show what would change without copying.",
     )
+    parser.add_argument(
+        "--preserve-metadata",
+        action="store_true",
+        help="Also copy file mode and timestamps (slower; default copies contents only).",
+    )
+    parser.add_argument(
+        "--link",
+        action="store_true",
+        help="Hardlink (or reflink) files instead of copying when on the same filesystem; falls back to copying.",
+    )
+    parser.add_argument(
+        "--jobs", "-j",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Number of emoji folders to process in parallel (default: CPU count; 1 disables multiprocessing).",
+    )
+    parser.add_argument(
+        "--quiet", "-q",
+        action="store_true",
+        help="Only print warnings and the final summary, not every copied file.",
+    )
     args = parser.parse_args()
 
     root = Path(args.root).resolve()
@@ -137,17 +200,31 @@ def main():
 
     # Ensure output root (and style subfolders) exist even if no files are found
     if not args.dry_run:
-        out_root.mkdir(parents=True, exist_ok=True)
+        ensure_dir(out_root)
         for _style in STYLE_DIRS:
-            (out_root / _style).mkdir(parents=True, exist_ok=True)
+            ensure_dir(out_root / _style)
 
     # If user points at a single emoji folder, process just that; otherwise walk children under assets_root
     if (assets_root / "metadata.json").exists():
-        process_emoji_dir(assets_root, out_root, args.dry_run)
+        write_lines(process_emoji_dir(assets_root, out_root, args.dry_run, args.preserve_metadata, args.link, args.quiet))
     else:
-        for child in sorted(assets_root.iterdir()):
-            if child.is_dir():
-                process_emoji_dir(child, out_root, args.dry_run)
+        children = [child for child in sorted(assets_root.iterdir()) if child.is_dir()]
+        # Emoji folders are independent of each other, so they can be processed in any order
+        process = partial(
+            process_emoji_dir,
+            out_root=out_root,
+            dry_run=args.dry_run,
+            preserve_metadata=args.preserve_metadata,
+            link=args.link,
+            quiet=args.quiet,
+        )
+        if args.jobs > 1:
+            with multiprocessing.Pool(args.jobs) as pool:
+                for msgs in pool.imap_unordered(process, children, chunksize=8):
+                    write_lines(msgs)
+        else:
+            for child in children:
+                write_lines(process(child))
 
     if args.dry_run:
         print(f"\n(DRY-RUN) Would write files under: {out_root}")
@@ -1,7 +1,11 @@
 # utils.py
 
 import csv
+import os
 from pathlib import Path
+import shutil
+import sys
+import tempfile
 
 """
 Utilities for scripts
@@ -20,3 +24,90 @@ groups = [
     ]
 
 styles = ["3D", "Color", "Flat", "High Contrast"]
+
+
+def write_lines(msgs):
+    """Write a batch of messages to stdout in a single call."""
+    if msgs:
+        sys.stdout.write("\n".join(msgs) + "\n")
+
+
+# Directories already created by ensure_dir in this process
+_mkdir_cache = set()
+
+
+def ensure_dir(path):
+    """Create `path` (and parents) if needed, skipping the syscalls for directories already ensured."""
+    path = str(path)
+    if path in _mkdir_cache:
+        return
+    os.makedirs(path, exist_ok=True)
+    _mkdir_cache.add(path)
+
+
+# Mode for newly written files (0666 minus the process umask), as open() would create them
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+_FILE_MODE = 0o666 & ~_UMASK
+
+# Linux ioctl that makes a file share the source's extents (reflink on Btrfs/XFS)
+FICLONE = 0x40049409
+
+
+def _reflink(src, dst) -> bool:
+    """Try to clone `src` into `dst` via FICLONE; return False if unsupported."""
+    try:
+        import fcntl
+    except ImportError:  # not available on Windows
+        return False
+    try:
+        with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+            fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+    except OSError:
+        return False
+    return True
+
+
+def _link_or_clone(src, dst) -> bool:
+    """Create `dst` as a hardlink to `src`, else as a reflink; return False if neither is possible."""
+    try:
+        os.link(src, dst)
+        return True
+    except OSError:
+        pass
+    return _reflink(src, dst)
+
+
+def copy_asset(src, dst, preserve_metadata=False, link=False):
+    """Copy `src` to `dst`, replacing `dst` if it exists.
+
+    Only file contents are copied unless `preserve_metadata` is set (then mode/mtime are kept too).
+    With `link`, try a hardlink and then a reflink before falling back to a regular copy
+    (e.g. when `src` and `dst` are on different filesystems).
+    The file is written under a temporary name next to `dst` and renamed over it, so `dst` is never
+    half-written, and a `dst` that is a hardlink from an earlier `link` run is replaced, not written through.
+    """
+    fd, tmp = tempfile.mkstemp(prefix=os.path.basename(dst) + ".", suffix=".tmp", dir=os.path.dirname(dst) or ".")
+    os.close(fd)
+    try:
+        if link:
+            os.unlink(tmp)  # os.link needs a free name
+            linked = _link_or_clone(src, tmp)
+        else:
+            os.chmod(tmp, _FILE_MODE)  # mkstemp creates 0600; use the mode open() would give
+            linked = False
+        if not linked:
+            if preserve_metadata:
+                shutil.copy2(src, tmp)
+            else:
+                shutil.copyfile(src, tmp)
+        os.replace(tmp, dst)
+        # rename() is a no-op when `tmp` and `dst` already link the same file (a `link` rerun)
+        if linked and os.path.lexists(tmp):
+            os.unlink(tmp)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except FileNotFoundError:
+            pass
+        raise